@@ -1,22 +1,86 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from flask import Flask, jsonify, request
+from flask.json.provider import JSONProvider
 from dag_builder import DAGBuilder
 from executor import execute_operations
 from dependency_resolver import resolve_dependencies
 import logging
-import json
+import orjson
+import threading
+import uuid
+
+class OrjsonProvider(JSONProvider):
+    """
+    Serializes request and response bodies with orjson instead of the standard library.
+    """
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s:%(message)s')
 
 dag_builder = DAGBuilder()
+# Requests are served concurrently; the DAG must only be read or modified while holding this lock
+dag_lock = threading.Lock()
+
+# Execution plans run one at a time in the background; /execute only submits them
+execution_pool = ThreadPoolExecutor(max_workers=1)
+# Status of submitted executions by run id: submitted or running runs are active, and completed
+# or failed runs are kept in the order they finished. Beyond RUN_STATUS_LIMIT entries the oldest
+# finished runs are forgotten, and /execute refuses new runs while RUN_STATUS_LIMIT are active.
+active_runs = {}
+finished_runs = OrderedDict()
+run_statuses_lock = threading.Lock()
+RUN_STATUS_LIMIT = 1000
+
+def submit_run(run_id):
+    """
+    Records a new run as submitted. Returns False without recording it if too many runs are active.
+    """
+    with run_statuses_lock:
+        if len(active_runs) >= RUN_STATUS_LIMIT:
+            return False
+        active_runs[run_id] = {"status": "submitted"}
+        _evict_finished_runs()
+        return True
+
+def set_run_status(run_id, status):
+    with run_statuses_lock:
+        if status["status"] in ("completed", "failed"):
+            active_runs.pop(run_id, None)
+            finished_runs[run_id] = status
+        else:
+            active_runs[run_id] = status
+        _evict_finished_runs()
+
+def _evict_finished_runs():
+    # The oldest finished runs are at the front, so eviction never scans the store
+    while len(active_runs) + len(finished_runs) > RUN_STATUS_LIMIT and finished_runs:
+        finished_runs.popitem(last=False)
+
+def run_execution(run_id, execution_plan):
+    set_run_status(run_id, {"status": "running"})
+    try:
+        execute_operations(execution_plan)
+        set_run_status(run_id, {"status": "completed"})
+        logging.info("Execution %s completed successfully.", run_id)
+    except Exception as e:
+        set_run_status(run_id, {"status": "failed", "error": str(e)})
+        logging.error("Execution %s failed: ", run_id, exc_info=True)
 
 @app.route('/add_node', methods=['POST'])
 def add_node():
     data = request.json
     try:
-        dag_builder.add_node(data['id'], data['type'], data['parameters'])
-        logging.info(f"Node {data['id']} added successfully.")
+        with dag_lock:
+            dag_builder.add_node(data['id'], data['type'], data['parameters'])
+        logging.info("Node %s added successfully.", data['id'])
         return jsonify({"message": "Node added successfully"}), 200
     except Exception as e:
         logging.error("Failed to add node: ", exc_info=True)
@@ -25,8 +89,9 @@ def add_node():
 @app.route('/remove_node/<node_id>', methods=['DELETE'])
 def remove_node(node_id):
     try:
-        dag_builder.remove_node(node_id)
-        logging.info(f"Node {node_id} removed successfully.")
+        with dag_lock:
+            dag_builder.remove_node(node_id)
+        logging.info("Node %s removed successfully.", node_id)
         return jsonify({"message": "Node removed successfully"}), 200
     except Exception as e:
         logging.error("Failed to remove node: ", exc_info=True)
@@ -36,8 +101,9 @@ def remove_node(node_id):
 def add_edge():
     data = request.json
     try:
-        dag_builder.add_edge(data['source'], data['target'])
-        logging.info(f"Edge from {data['source']} to {data['target']} added successfully.")
+        with dag_lock:
+            dag_builder.add_edge(data['source'], data['target'])
+        logging.info("Edge from %s to %s added successfully.", data['source'], data['target'])
         return jsonify({"message": "Edge added successfully"}), 200
     except Exception as e:
         logging.error("Failed to add edge: ", exc_info=True)
@@ -47,8 +113,9 @@ def add_edge():
 def remove_edge():
     data = request.json
     try:
-        dag_builder.remove_edge(data['source'], data['target'])
-        logging.info(f"Edge from {data['source']} to {data['target']} removed successfully.")
+        with dag_lock:
+            dag_builder.remove_edge(data['source'], data['target'])
+        logging.info("Edge from %s to %s removed successfully.", data['source'], data['target'])
         return jsonify({"message": "Edge removed successfully"}), 200
     except Exception as e:
         logging.error("Failed to remove edge: ", exc_info=True)
@@ -57,23 +124,37 @@ def remove_edge():
 @app.route('/execute', methods=['GET'])
 def execute():
     try:
-        execution_plan = resolve_dependencies(dag_builder.graph)
-        execute_operations(execution_plan)
-        logging.info("Execution started successfully.")
-        return jsonify({"message": "Execution started"}), 202
+        with dag_lock:
+            execution_plan = resolve_dependencies(dag_builder.graph, dag_builder.topological_order(), dag_builder.version)
+        run_id = uuid.uuid4().hex
+        if not submit_run(run_id):
+            logging.error("Execution refused: %d runs are already active.", RUN_STATUS_LIMIT)
+            return jsonify({"error": "Too many executions are pending, try again later"}), 503
+        execution_pool.submit(run_execution, run_id, execution_plan)
+        logging.info("Execution %s submitted successfully.", run_id)
+        return jsonify({"run_id": run_id, "status": "submitted"}), 202
     except Exception as e:
         logging.error("Failed to start execution: ", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
+@app.route('/status/<run_id>', methods=['GET'])
+def get_status(run_id):
+    with run_statuses_lock:
+        status = active_runs.get(run_id) or finished_runs.get(run_id)
+    if status is None:
+        return jsonify({"error": f"Execution {run_id} not found"}), 404
+    return jsonify({"run_id": run_id, **status}), 200
+
 @app.route('/dag', methods=['GET'])
 def get_dag():
     try:
-        dag_json = dag_builder.to_json()
+        with dag_lock:
+            dag_dict = dag_builder.to_dict()
         logging.info("DAG fetched successfully.")
-        return jsonify({"dag": json.loads(dag_json)}), 200
+        return jsonify({"dag": dag_dict}), 200
     except Exception as e:
         logging.error("Failed to fetch DAG: ", exc_info=True)
         return jsonify({"error": str(e)}), 400
 
-if __name__ == '__main__':
-    app.run(host='127.0.0.1', port=8080)
\ No newline at end of file
+# The Flask development server handles one request at a time; serve the app through wsgi.py
+# with a production WSGI server instead (see README).
@@ -1,112 +1,281 @@
-import json
+import orjson
 import networkx as nx
 import logging
-from sourcemeta import MetaSource
-from function_registry import get_operation_function
+from fastjsonschema import JsonSchemaException
+from function_registry import VALIDATORS, get_operation_function
+from nodespec import NodeSpec
+from dependency_resolver import resolve_components
+
+def _convert_to_internal_parameters(parameters):
+    """
+    Converts the user-facing parameter list into the internal representation. Column names are
+    collected under "columns", and operation-specific settings such as window_size are kept
+    under their own names. Every key of an entry is kept, whether or not it shares the entry
+    with a column or value.
+    """
+    internal_params = {"columns": [], "value": None}
+    for param in parameters:
+        for name, setting in param.items():
+            if name == "column":
+                internal_params["columns"].append(setting)
+            else:
+                internal_params[name] = setting
+    return internal_params
 
 class DAGBuilder:
     def __init__(self):
         self.graph = nx.DiGraph()
+        # Online topological order (Pearce-Kelly): node id -> position, and position -> node id
+        self._order = {}
+        self._rev = []
+        # Set while non-strict edits have left cycles in the graph; the order above is then
+        # not topological and is rebuilt once the cycles are removed
+        self._cyclic = False
+        # In-degree of every node, and the nodes whose in-degree is zero
+        self._indeg = {}
+        self._zero_indegree = set()
+        # Bumped on every mutation so derived views can be cached until the DAG changes
+        self._version = 0
+        self._dict_cache = (-1, None)
 
     def add_node(self, node_id, node_type, parameters):
         try:
-            # Verify if the node type is supported by checking against the function registry
-            try:
-                get_operation_function(node_type)
-            except ValueError as e:
-                raise ValueError(f"Unsupported node type: {node_type}. Error: {e}")
-
             if node_id in self.graph:
                 raise ValueError(f"Node with id {node_id} already exists.")
-            if not self._validate_parameters(node_type, parameters):
-                raise ValueError(f"Invalid parameters for node type {node_type}.")
-            # Updating internal representation to accommodate new parameter format
-            internal_parameters = self._convert_to_internal_parameters(parameters)
-            self.graph.add_node(node_id, type=node_type, parameters=internal_parameters)
-            logging.info(f"Node {node_id} added successfully.")
+            spec = self._prepare_node(node_type, parameters)
+            self.graph.add_node(node_id, spec=spec)
+            self._order[node_id] = len(self._rev)
+            self._rev.append(node_id)
+            self._indeg[node_id] = 0
+            self._zero_indegree.add(node_id)
+            self._version += 1
+            logging.info("Node %s added successfully.", node_id)
         except Exception as e:
-            logging.error(f"Failed to add node {node_id}: {e}", exc_info=True)
+            logging.error("Failed to add node %s: %s", node_id, e, exc_info=True)
             raise
 
-    def _validate_parameters(self, node_type, parameters):
-        """
-        Validates parameters based on node type. This method should be extended
-        to handle specific validation logic for different node types and parameter formats.
-        """
-        # Updated validation logic to handle new parameter format
-        if node_type == "ADD":
-            if not isinstance(parameters, list) or not all(isinstance(param, dict) for param in parameters):
-                return False
-            for param in parameters:
-                if "column" in param:
-                    if not isinstance(param["column"], str):
-                        return False
-                elif "value" in param:
-                    if not isinstance(param["value"], (int, float)):
-                        return False
-                else:
-                    return False
-        # Add more validation logic for other operations as needed
-        return True
-
-    def _convert_to_internal_parameters(self, parameters) -> MetaSource:
-        """
-        Converts the new parameter format to the internal representation.
-        """
-        internal_params = {"sources": []}
-        for param in parameters:
-            if "column" in param:
-                internal_params["columns"].append(param["column"])
-            elif "value" in param:
-                internal_params["value"] = param["value"]
-        return internal_params
+    def _prepare_node(self, node_type, parameters):
+        """
+        Checks the node type against the function registry and validates its parameters, returning
+        the NodeSpec to store on the node. Raises ValueError if either is invalid.
+        """
+        # Verify if the node type is supported by checking against the function registry;
+        # the lookup raises TypeError for unhashable types such as lists
+        try:
+            operation_function, required_params = get_operation_function(node_type)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Unsupported node type: {node_type}. Error: {e}")
+
+        # Node types without a schema are accepted as-is
+        validator = VALIDATORS.get(node_type)
+        if validator is not None:
+            try:
+                validator(parameters)
+            except JsonSchemaException as e:
+                raise ValueError(f"Invalid parameters for node type {node_type}: {e.message}")
+        return NodeSpec(node_type, _convert_to_internal_parameters(parameters), operation_function, required_params)
 
     def remove_node(self, node_id):
         try:
             if node_id in self.graph:
+                for successor in self.graph.successors(node_id):
+                    self._indeg[successor] -= 1
+                    if self._indeg[successor] == 0:
+                        self._zero_indegree.add(successor)
+                del self._indeg[node_id]
+                self._zero_indegree.discard(node_id)
                 self.graph.remove_node(node_id)
-                logging.info(f"Node {node_id} removed successfully.")
+                index = self._order.pop(node_id)
+                del self._rev[index]
+                for position in range(index, len(self._rev)):
+                    self._order[self._rev[position]] = position
+                if self._cyclic:
+                    self._rebuild_order()
+                self._version += 1
+                logging.info("Node %s removed successfully.", node_id)
             else:
-                logging.info(f"Node {node_id} not found.")
+                logging.info("Node %s not found.", node_id)
         except Exception as e:
-            logging.error(f"Failed to remove node {node_id}: {e}", exc_info=True)
+            logging.error("Failed to remove node %s: %s", node_id, e, exc_info=True)
             raise
 
-    def add_edge(self, source_id, target_id):
+    def add_edge(self, source_id, target_id, strict=True):
+        """
+        Adds a dependency from source_id to target_id. By default an edge that would create a cycle
+        is rejected with ValueError; with strict=False it is kept, for example during bulk edits
+        where a later cleanup removes the offending edge. Until then the DAG can only be
+        executed through resolve_with_condensation.
+        """
         try:
             if source_id not in self.graph or target_id not in self.graph:
                 raise ValueError("One of the nodes in the edge does not exist.")
+            if self.graph.has_edge(source_id, target_id):
+                logging.info("Edge from %s to %s already exists.", source_id, target_id)
+                return
+            if self._cyclic:
+                if strict and nx.has_path(self.graph, target_id, source_id):
+                    raise ValueError("Adding this edge would create a cycle.")
+            # An edge that agrees with the current order can neither create a cycle nor invalidate it
+            elif self._order[source_id] >= self._order[target_id]:
+                try:
+                    self._reorder(source_id, target_id)
+                except ValueError:
+                    if strict:
+                        raise
+                    self._cyclic = True
+                    logging.info("Edge from %s to %s creates a cycle.", source_id, target_id)
             self.graph.add_edge(source_id, target_id)
-            if list(nx.simple_cycles(self.graph)):
-                self.graph.remove_edge(source_id, target_id)
-                raise ValueError("Adding this edge would create a cycle.")
-            logging.info(f"Edge from {source_id} to {target_id} added successfully.")
+            self._indeg[target_id] += 1
+            self._zero_indegree.discard(target_id)
+            self._version += 1
+            logging.info("Edge from %s to %s added successfully.", source_id, target_id)
         except Exception as e:
-            logging.error(f"Failed to add edge from {source_id} to {target_id}: {e}", exc_info=True)
+            logging.error("Failed to add edge from %s to %s: %s", source_id, target_id, e, exc_info=True)
             raise
 
+    def _reorder(self, source_id, target_id):
+        """
+        Repairs the topological order ahead of inserting an edge that points backwards in it
+        (Pearce-Kelly). Only the nodes positioned between the two endpoints are visited.
+        Raises ValueError without modifying the order if the edge would create a cycle.
+        """
+        lower, upper = self._order[target_id], self._order[source_id]
+
+        # Nodes reachable from the target that are currently placed no later than the source
+        forward = []
+        stack, seen = [target_id], {target_id}
+        while stack:
+            node = stack.pop()
+            if node == source_id:
+                raise ValueError("Adding this edge would create a cycle.")
+            forward.append(node)
+            for successor in self.graph.successors(node):
+                if successor not in seen and self._order[successor] <= upper:
+                    seen.add(successor)
+                    stack.append(successor)
+
+        # Nodes reaching the source that are currently placed after the target
+        backward = []
+        stack, seen = [source_id], {source_id}
+        while stack:
+            node = stack.pop()
+            backward.append(node)
+            for predecessor in self.graph.predecessors(node):
+                if predecessor not in seen and self._order[predecessor] > lower:
+                    seen.add(predecessor)
+                    stack.append(predecessor)
+
+        # Reassign the freed positions so the backward set precedes the forward set
+        backward.sort(key=self._order.__getitem__)
+        forward.sort(key=self._order.__getitem__)
+        nodes = backward + forward
+        positions = sorted(self._order[node] for node in nodes)
+        for node, position in zip(nodes, positions):
+            self._order[node] = position
+            self._rev[position] = node
+
+    def _rebuild_order(self):
+        """
+        Recomputes the topological order from scratch. If the graph still has cycles, the nodes
+        are kept in insertion order and the DAG stays marked as cyclic.
+        """
+        try:
+            self._rev = list(nx.topological_sort(self.graph))
+            self._cyclic = False
+        except nx.NetworkXUnfeasible:
+            self._rev = list(self.graph)
+            self._cyclic = True
+        self._order = {node_id: position for position, node_id in enumerate(self._rev)}
+
+    def has_cycles(self):
+        """
+        Returns True if non-strict edits have left cycles in the graph.
+        """
+        return self._cyclic
+
+    @property
+    def version(self):
+        """
+        A counter that changes whenever the DAG is modified.
+        """
+        return self._version
+
+    def topological_order(self):
+        """
+        Returns the node ids in an order where every node comes after all of its dependencies.
+        The order is maintained incrementally as the DAG is edited, so this is a plain copy.
+        Raises ValueError if the graph has cycles.
+        """
+        if self._cyclic:
+            raise ValueError("The graph contains a cycle, which is not allowed in a DAG.")
+        return list(self._rev)
+
+    def resolve_with_condensation(self):
+        """
+        Builds an execution plan that tolerates cycles: each strongly connected component runs
+        as a single group, in topological order of the condensed graph.
+        Returns:
+            execution_plan (list): One delayed object per strongly connected component.
+        """
+        return resolve_components(self.graph)
+
+    def in_degrees(self):
+        """
+        Returns the number of dependencies of every node, for resolve_dependencies callers that
+        do not pass topological_order(). The mapping is maintained incrementally and shared with
+        the builder, so it should not be modified.
+        """
+        return self._indeg
+
+    def roots(self):
+        """
+        Returns the set of nodes without dependencies, for resolve_dependencies callers that
+        do not pass topological_order(). The set is maintained incrementally and shared with the
+        builder, so it should not be modified.
+        """
+        return self._zero_indegree
+
     def remove_edge(self, source_id, target_id):
         try:
             if self.graph.has_edge(source_id, target_id):
                 self.graph.remove_edge(source_id, target_id)
-                logging.info(f"Edge from {source_id} to {target_id} removed successfully.")
+                self._indeg[target_id] -= 1
+                if self._indeg[target_id] == 0:
+                    self._zero_indegree.add(target_id)
+                if self._cyclic:
+                    self._rebuild_order()
+                self._version += 1
+                logging.info("Edge from %s to %s removed successfully.", source_id, target_id)
             else:
-                logging.info(f"Edge from {source_id} to {target_id} not found.")
+                logging.info("Edge from %s to %s not found.", source_id, target_id)
         except Exception as e:
-            logging.error(f"Failed to remove edge from {source_id} to {target_id}: {e}", exc_info=True)
+            logging.error("Failed to remove edge from %s to %s: %s", source_id, target_id, e, exc_info=True)
             raise
 
-    def to_json(self):
+    def to_dict(self):
+        """
+        Returns the DAG configuration as a JSON-serializable dict of nodes and edges.
+        The result is shared until the DAG changes and should not be modified.
+        """
         try:
-            nodes = [{"id": n, "type": self.graph.nodes[n]['type'], "parameters": self._convert_from_internal_parameters(self.graph.nodes[n]['parameters'])} for n in self.graph.nodes()]
+            if self._dict_cache[0] == self._version:
+                return self._dict_cache[1]
+            nodes = [{"id": n, "type": d['spec'].type, "parameters": self._convert_from_internal_parameters(d['spec'].parameters)} for n, d in self.graph.nodes(data=True)]
             edges = [{"source": u, "target": v} for u, v in self.graph.edges()]
-            dag_json = json.dumps({"nodes": nodes, "edges": edges}, indent=4)
-            logging.info("DAG exported to JSON successfully.")
-            return dag_json
+            dag_dict = {"nodes": nodes, "edges": edges}
+            self._dict_cache = (self._version, dag_dict)
+            logging.info("DAG exported successfully.")
+            return dag_dict
         except Exception as e:
-            logging.error(f"Failed to export DAG to JSON: {e}", exc_info=True)
+            logging.error("Failed to export DAG: %s", e, exc_info=True)
             raise
 
+    def to_json(self):
+        """
+        Returns the DAG configuration serialized as an indented JSON string.
+        """
+        return orjson.dumps(self.to_dict(), option=orjson.OPT_INDENT_2).decode()
+
     def _convert_from_internal_parameters(self, parameters):
         """
         Converts the internal parameter representation back into the user-specified format for JSON export.
@@ -116,6 +285,9 @@ class DAGBuilder:
             params.append({"column": col})
         if parameters["value"] is not None:
             params.append({"value": parameters["value"]})
+        for name, setting in parameters.items():
+            if name not in ("columns", "value"):
+                params.append({name: setting})
         return params
 
     def save_to_file(self, filepath):
@@ -128,33 +300,49 @@ class DAGBuilder:
             dag_json = self.to_json()
             with open(filepath, 'w') as file:
                 file.write(dag_json)
-            logging.info(f"DAG configuration saved to {filepath} successfully.")
+            logging.info("DAG configuration saved to %s successfully.", filepath)
         except Exception as e:
-            logging.error(f"Failed to save DAG to {filepath}: {e}", exc_info=True)
+            logging.error("Failed to save DAG to %s: %s", filepath, e, exc_info=True)
             raise
 
-    def load_from_file(self, filepath):
+    def load_from_file(self, filepath, strict=True):
         """
         Loads the DAG configuration from a JSON file and reconstructs the DAG.
         Parameters:
             filepath (str): The path to the file from which the DAG configuration will be loaded.
+            strict (bool): Whether to reject a configuration that contains cycles. See add_edge.
         """
         try:
-            with open(filepath, 'r') as file:
-                dag_config = json.load(file)
+            with open(filepath, 'rb') as file:
+                dag_config = orjson.loads(file.read())
 
-            # Clear existing DAG before loading new configuration
-            self.graph.clear()
+            # Validate the whole configuration before replacing the existing DAG
+            nodes = []
             for node in dag_config["nodes"]:
-                # Correctly convert the parameters for loading
-                converted_parameters = [{"column": p["column"]} if "column" in p else {"value": p["value"]} for p in node["parameters"]]
-                self.add_node(node["id"], node["type"], converted_parameters)
-            for edge in dag_config["edges"]:
-                self.add_edge(edge["source"], edge["target"])
+                nodes.append((node["id"], {"spec": self._prepare_node(node["type"], node["parameters"])}))
+
+            graph = nx.DiGraph()
+            graph.add_nodes_from(nodes)
+            if len(graph) != len(nodes):
+                raise ValueError("The DAG configuration contains duplicate node ids.")
+            edges = [(edge["source"], edge["target"]) for edge in dag_config["edges"]]
+            for source_id, target_id in edges:
+                if source_id not in graph or target_id not in graph:
+                    raise ValueError("One of the nodes in the edge does not exist.")
+            graph.add_edges_from(edges)
+            # A single check for the whole batch instead of one per edge
+            if strict and not nx.is_directed_acyclic_graph(graph):
+                raise ValueError("The DAG configuration contains a cycle.")
+
+            self.graph = graph
+            self._rebuild_order()
+            self._indeg = dict(graph.in_degree())
+            self._zero_indegree = {node_id for node_id, degree in self._indeg.items() if degree == 0}
+            self._version += 1
 
-            logging.info(f"DAG configuration loaded from {filepath} successfully.")
+            logging.info("DAG configuration loaded from %s successfully.", filepath)
         except Exception as e:
-            logging.error(f"Failed to load DAG from {filepath}: {e}", exc_info=True)
+            logging.error("Failed to load DAG from %s: %s", filepath, e, exc_info=True)
             raise
 
 # Example usage
@@ -168,4 +356,4 @@ if __name__ == "__main__":
         dag.load_from_file("dag_configuration.json")  # Example load operation
         print(dag.to_json())
     except Exception as e:
-        logging.error(f"An error occurred during DAGBuilder usage: {e}", exc_info=True)
\ No newline at end of file
+        logging.error("An error occurred during DAGBuilder usage: %s", e, exc_info=True)
\ No newline at end of file
@@ -1,94 +1,189 @@
 from dask import delayed
 import networkx as nx
-from collections import deque
+from collections import OrderedDict, deque
 import logging
 from function_registry import get_operation_function
-import time
+from nodespec import NodeSpec
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s:%(message)s')
 
-def resolve_dependencies(graph):
+# Recently resolved node orders keyed by (graph, version), least recently used first. Only the
+# order is reused: every resolve builds fresh delayed tasks, so each run submits new task keys
+# and its nodes are always executed rather than answered from a previous run's results
+_order_cache = OrderedDict()
+_ORDER_CACHE_SIZE = 8
+
+def resolve_dependencies(graph, order=None, version=None, indeg=None, roots=None):
     """
     Analyzes the DAG structure to determine an optimal execution order using Dask.
     Parameters:
         graph (nx.DiGraph): The DAG graph object from dag_builder.
+        order (list, optional): A precomputed topological order of the node ids, such as
+            DAGBuilder.topological_order(). When omitted the order is computed from the graph.
+        version (int, optional): The graph version, such as DAGBuilder.version. When given,
+            the execution order is reused for as long as the same graph is resolved at the
+            same version.
+        indeg (dict, optional): The in-degree of every node, such as DAGBuilder.in_degrees().
+            Only read; computed from the graph when omitted.
+        roots (iterable, optional): The nodes without dependencies, such as DAGBuilder.roots().
+            Computed from the in-degrees when omitted.
     Returns:
-        execution_plan (list): A list of delayed objects representing the execution plan.
+        execution_plan (list): A list of delayed objects representing the execution plan. Each
+            node's task takes the tasks of its predecessors as inputs, so Dask never runs a node
+            before its dependencies, whichever scheduler executes the plan.
     """
     try:
         if not isinstance(graph, nx.DiGraph):
             raise ValueError("The graph must be an instance of nx.DiGraph.")
 
-        execution_plan = []
-        visited = set()
+        if version is None:
+            execution_order = _resolve_order(graph, order, indeg, roots)
+        else:
+            key = (graph, version)
+            execution_order = _order_cache.get(key)
+            if execution_order is None:
+                execution_order = tuple(_resolve_order(graph, order, indeg, roots))
+                _order_cache[key] = execution_order
+                if len(_order_cache) > _ORDER_CACHE_SIZE:
+                    _order_cache.popitem(last=False)
+            else:
+                _order_cache.move_to_end(key)
+
+        execution_plan = _build_plan(graph, execution_order)
+        logging.info("Dependency resolution completed successfully.")
+        return execution_plan
+    except Exception as e:
+        logging.error("Failed to resolve dependencies: ", exc_info=True)
+        raise
+
+def _resolve_order(graph, order, indeg, roots):
+    if order is not None:
+        return order
+
+    execution_order = []
+    if indeg is None:
         indegree_map = {node: graph.in_degree(node) for node in graph}
+    else:
+        indegree_map = dict(indeg)
+    if roots is None:
+        roots = [node for node in graph if indegree_map[node] == 0]
 
-        # Using deque for efficient pop from the left
-        queue = deque([node for node in graph if indegree_map[node] == 0])
+    # Using deque for efficient pop from the left
+    queue = deque(roots)
+    # Hot-loop lookups bound once: the graph's successor adjacency dicts and the bound methods
+    successors = graph._succ
+    popleft, append = queue.popleft, queue.append
+    add_node = execution_order.append
 
-        while queue:
-            node = queue.popleft()
-            visited.add(node)
-            operation = delayed(execute_node)(graph.nodes[node], node)
-            execution_plan.append(operation)
+    while queue:
+        node = popleft()
+        add_node(node)
 
-            for successor in graph.successors(node):
-                indegree_map[successor] -= 1
-                if indegree_map[successor] == 0:
-                    queue.append(successor)
+        for successor in successors[node]:
+            indegree_map[successor] -= 1
+            if indegree_map[successor] == 0:
+                append(successor)
 
-        # Ensure all nodes were visited (i.e., the graph is a DAG)
-        if len(visited) != len(graph.nodes):
-            raise ValueError("The graph contains a cycle, which is not allowed in a DAG.")
+    # Each node is queued exactly once when its last dependency is processed, so any node
+    # left out of the order lies on or behind a cycle
+    if len(execution_order) != len(graph):
+        raise ValueError("The graph contains a cycle, which is not allowed in a DAG.")
 
-        logging.info("Dependency resolution completed successfully.")
+    return execution_order
+
+def _build_plan(graph, execution_order):
+    # The graph's own node -> attribute dict mapping, bound once instead of a NodeView lookup per node
+    node_data = graph._node
+    predecessors = graph._pred
+    tasks = {}
+    execution_plan = []
+    for node in execution_order:
+        # Predecessors are always resolved first, since nodes are visited in topological order
+        dependencies = [tasks[predecessor] for predecessor in predecessors[node]]
+        task = delayed(execute_node)(node_data[node], node, dependencies)
+        tasks[node] = task
+        execution_plan.append(task)
+    return execution_plan
+
+def resolve_components(graph):
+    """
+    Determines an execution order for a graph that may contain cycles. Each strongly connected
+    component is executed as one group, and the groups follow the topological order of the
+    condensed graph.
+    Parameters:
+        graph (nx.DiGraph): The graph object from dag_builder.
+    Returns:
+        execution_plan (list): A list of delayed objects, one per strongly connected component.
+            Each component's task takes the tasks of its predecessor components as inputs.
+    """
+    try:
+        condensed = nx.condensation(graph)
+        node_data = graph._node
+        # Members of a component run in the order the nodes were added to the graph
+        position = {node: index for index, node in enumerate(graph)}
+
+        execution_plan = []
+        component_tasks = {}
+        for component in nx.topological_sort(condensed):
+            members = sorted(condensed.nodes[component]["members"], key=position.__getitem__)
+            dependencies = [component_tasks[predecessor] for predecessor in condensed.predecessors(component)]
+            task = delayed(execute_component)([(node_data[node], node) for node in members], dependencies)
+            component_tasks[component] = task
+            execution_plan.append(task)
+
+        logging.info("Dependency resolution with condensation completed successfully.")
         return execution_plan
     except Exception as e:
-        logging.error("Failed to resolve dependencies: ", exc_info=True)
+        logging.error("Failed to resolve dependencies with condensation: ", exc_info=True)
         raise
 
-def execute_node(node_data, node_id):
+def execute_component(members, dependencies=None):
+    """
+    Executes the nodes of one strongly connected component in sequence.
+    Parameters:
+        members (list): (node_data, node_id) pairs of the component's nodes.
+        dependencies (list): Results of the predecessor components; unused and only there so
+            that Dask runs them first.
     """
-    Dynamically calls the function associated with a node's type from the function registry
-    based on the node data passed to it.
+    for node_data, node_id in members:
+        execute_node(node_data, node_id)
+
+def execute_node(node_data, node_id, dependencies=None):
+    """
+    Calls the operation function bound to the node when it was added, with the node's parameters.
+    The dependencies argument receives the results of the node's predecessors; it is unused and
+    only there so that Dask runs them first.
     """
     try:
-        logging.info(f"Starting execution of node {node_id} with data: {node_data}")
-        
-        node_type = node_data['type']
-        operation_function, required_params = get_operation_function(node_type)
+        logging.info("Starting execution of node %s with data: %s", node_id, node_data)
         
-        # Extract parameters from node_data
-        parameters = node_data.get('parameters', {})
+        spec = node_data['spec']
         
         # Validate that all required parameters are provided
-        missing_params = [param for param in required_params if param not in parameters]
+        missing_params = [param for param in spec.required if param not in spec.parameters]
         if missing_params:
-            raise ValueError(f"Missing required parameters for node {node_id} of type {node_type}: {missing_params}")
+            raise ValueError(f"Missing required parameters for node {node_id} of type {spec.type}: {missing_params}")
         
         # Execute the operation function with the parameters
-        operation_function(parameters)
-        
-        # Simulate execution with a sleep
-        time.sleep(1)  # Simulating execution time for the operation
+        spec.fn(spec.parameters)
         
-        logging.info(f"Completed execution of node {node_id}")
+        logging.info("Completed execution of node %s", node_id)
     except Exception as e:
-        logging.error(f"Failed to execute node {node_id}: {e}", exc_info=True)
+        logging.error("Failed to execute node %s: %s", node_id, e, exc_info=True)
         raise
 
 if __name__ == "__main__":
     try:
         # This is a placeholder example. Integration with dag_builder.py is necessary for practical use.
         G = nx.DiGraph()
-        G.add_node(1, operation="dummy_op", parameters={"param1": "value1"})
-        G.add_node(2, operation="another_op", parameters={"param2": "value2"})
+        G.add_node(1, spec=NodeSpec("ADD", {"columns": ["col1"], "value": 1}, *get_operation_function("ADD")))
+        G.add_node(2, spec=NodeSpec("ADD", {"columns": ["col2"], "value": 2}, *get_operation_function("ADD")))
         G.add_edge(1, 2)
 
         plan = resolve_dependencies(G)
         # Execute the plan (for demonstration purposes, in actual use this should be handled more appropriately)
         for step in plan:
             result = step.compute()
-            logging.info(f"Step result: {result}")
+            logging.info("Step result: %s", result)
     except Exception as e:
         logging.error("An error occurred in the main execution block: ", exc_info=True)
\ No newline at end of file
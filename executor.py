@@ -1,54 +1,83 @@
+import dask
 from dask.distributed import Client, as_completed
+import atexit
 import logging
+import os
+import threading
 from dependency_resolver import resolve_dependencies
 from dag_builder import DAGBuilder
 import time
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s:%(message)s')
 
+# Plans with fewer operations than this run in-process, where the cluster overhead would dominate.
+# Setting DAG_LOCAL=1 in the environment runs every plan in-process.
+LOCAL_EXECUTION_THRESHOLD = 16
+
+# Dask client shared by all executions in this process, started on first use
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+def _get_client():
+    """
+    Returns the process-wide Dask client, starting the local cluster the first time it is needed.
+    """
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = Client(memory_limit='4GB', n_workers=4, threads_per_worker=1)
+            logging.info("Dask client initialized for parallel execution.")
+        return _CLIENT
+
+def _shutdown_client():
+    global _CLIENT
+    if _CLIENT is not None:
+        _CLIENT.shutdown()
+        _CLIENT = None
+        logging.info("Dask client shutdown.")
+
+atexit.register(_shutdown_client)
+
 def execute_operations(execution_plan, retry_attempts=3):
     """
     Executes the given operation plan in parallel using Dask, with retries for failed operations.
+    Small plans are executed in-process with the synchronous scheduler and are not retried.
     Parameters:
         execution_plan (list): A list of delayed objects representing the operations to be executed.
         retry_attempts (int): The number of times to retry failed operations.
     """
     try:
-        client = Client(memory_limit='4GB', n_workers=4, threads_per_worker=1)
-        logging.info("Dask client initialized for parallel execution. Starting operations...")
+        if len(execution_plan) < LOCAL_EXECUTION_THRESHOLD or os.environ.get("DAG_LOCAL") == "1":
+            logging.info("Executing operations in-process...")
+            for result in dask.compute(*execution_plan, scheduler="synchronous"):
+                logging.info("Operation completed with result: %s", result)
+            return
+
+        client = _get_client()
+        logging.info("Starting operations...")
         futures = client.compute(execution_plan)
-        operation_retry_attempts = {future: retry_attempts for future in futures}  # Track retries per operation
-        all_futures = list(futures)  # Keep track of all futures, including retries
+        remaining_attempts = {future: retry_attempts for future in futures}  # Track retries per operation
 
-        while all_futures:
-            for future in as_completed(all_futures):
-                if future in operation_retry_attempts:  # If future is still being tracked for retries
-                    try:
-                        result = future.result()  # Blocks until the future is done
-                        logging.info(f"Operation completed with result: {result}")
-                        all_futures.remove(future)  # Remove from tracking once succeeded
-                        del operation_retry_attempts[future]  # No longer tracking retries for this future
-                    except Exception as e:
-                        logging.error(f"Operation failed: {e}", exc_info=True)
-                        current_attempts = operation_retry_attempts[future]
-                        if current_attempts > 1:
-                            logging.info("Retrying failed operation.")
-                            retry_future = client.retry(future)
-                            operation_retry_attempts[retry_future] = current_attempts - 1  # Update retry attempts for the new future
-                            all_futures.append(retry_future)  # Add new future to the list for tracking
-                        else:
-                            logging.error("Max retry attempts reached. Operation permanently failed.", exc_info=True)
-                            raise
-                        all_futures.remove(future)  # Remove failed attempt from tracking
-                        del operation_retry_attempts[future]  # Stop tracking retries for the failed future
+        # One iterator for the whole run; retried futures are fed back into it and it stops
+        # once every future has been yielded in a finished state
+        completed = as_completed(futures)
+        for future in completed:
+            try:
+                result = future.result()
+                logging.info("Operation completed with result: %s", result)
+            except Exception as e:
+                logging.error("Operation failed: %s", e, exc_info=True)
+                if remaining_attempts[future] > 1:
+                    logging.info("Retrying failed operation.")
+                    remaining_attempts[future] -= 1
+                    future.retry()  # Reruns the same task in place, so the future keeps its identity
+                    completed.add(future)
                 else:
-                    all_futures.remove(future)  # Clean up any futures that are no longer being tracked
+                    logging.error("Max retry attempts reached. Operation permanently failed.", exc_info=True)
+                    raise
     except Exception as e:
-        logging.error(f"Failed to execute operations: {e}", exc_info=True)
+        logging.error("Failed to execute operations: %s", e, exc_info=True)
         raise
-    finally:
-        client.shutdown()
-        logging.info("Dask client shutdown after completing operations.")
 
 if __name__ == "__main__":
     try:
@@ -57,11 +86,13 @@ if __name__ == "__main__":
         dag_builder = DAGBuilder()
         # Example nodes and edges added to dag_builder as per your DAG configuration
         # These lines are placeholders and should be modified according to the actual operations and dependencies in your DAG.
-        dag_builder.add_node("1", "ADD", {"columns": ["col1", "col2"], "value": 5})
-        dag_builder.add_node("2", "SMA", {"window_size": 5, "column": "col3"})
+        dag_builder.add_node("1", "ADD", [{"column": "col1"}, {"column": "col2"}, {"value": 5}])
+        dag_builder.add_node("2", "SMA", [{"window_size": 5}, {"column": "col3"}])
         dag_builder.add_edge("1", "2")
 
-        execution_plan = resolve_dependencies(dag_builder.graph)
+        # Without a precomputed order the resolver sorts the nodes itself, starting from the
+        # in-degrees and roots the builder maintains
+        execution_plan = resolve_dependencies(dag_builder.graph, indeg=dag_builder.in_degrees(), roots=dag_builder.roots())
         execute_operations(execution_plan)
     except Exception as e:
         logging.error("An error occurred in the main execution block: ", exc_info=True)
\ No newline at end of file
@@ -1,3 +1,4 @@
+import fastjsonschema
 import logging
 import talib
 import numpy as np
@@ -6,10 +7,10 @@ import numpy as np
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 def add_operation(parameters):
-    logging.info(f"Executing ADD operation with parameters: {parameters}")
+    logging.info("Executing ADD operation with parameters: %s", parameters)
 
 def sma_operation(parameters):
-    logging.info(f"Executing SMA operation with parameters: {parameters}")
+    logging.info("Executing SMA operation with parameters: %s", parameters)
 
 def adx_operation(parameters):
     """
@@ -19,25 +20,80 @@ def adx_operation(parameters):
     - parameters (dict): A dictionary containing 'high', 'low', 'close' price arrays and 'time_period'.
     """
     try:
-        high = np.array(parameters['high'])
-        low = np.array(parameters['low'])
-        close = np.array(parameters['close'])
+        # TA-Lib needs contiguous float64 input; arrays that already match are used without copying
+        high = np.ascontiguousarray(parameters['high'], dtype=np.float64)
+        low = np.ascontiguousarray(parameters['low'], dtype=np.float64)
+        close = np.ascontiguousarray(parameters['close'], dtype=np.float64)
         time_period = parameters['time_period']
         
         adx = talib.ADX(high, low, close, time_period=time_period)
-        logging.info(f"Executing ADX operation with time_period: {time_period}")
+        logging.info("Executing ADX operation with time_period: %s", time_period)
         return adx
     except Exception as e:
-        logging.error(f"Failed to compute ADX: {e}", exc_info=True)
+        logging.error("Failed to compute ADX: %s", e, exc_info=True)
         raise
 
 # Function registry mapping node types to (function, list of required parameters)
 function_registry = {
     'ADD': (add_operation, ['columns', 'value']),  # Assuming 'columns' is a list of column names and 'value' is the value to add
-    'SMA': (sma_operation, ['window_size', 'column']),  # Assuming 'window_size' is an integer and 'column' is the name of the column
+    'SMA': (sma_operation, ['window_size', 'columns']),  # Assuming 'window_size' is an integer and 'columns' holds the name of the column
     'ADX': (adx_operation, ['high', 'low', 'close', 'time_period'])  # Adding ADX to the function registry
 }
 
+_PRICES = {"type": "array", "items": {"type": "number"}}
+
+def _requires(*names):
+    # Each named key has to appear in at least one entry of the parameter list
+    return [{"contains": {"required": [name]}} for name in names]
+
+# JSON schemas for the user-facing parameter list of each node type. Every entry is an object
+# naming a dataframe column or holding a primitive value, or an operation-specific setting.
+# The settings an operation needs to run are required here, so a node missing them is
+# rejected when it is added rather than when it is executed.
+SCHEMAS = {
+    'ADD': {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "if": {"required": ["column"]},
+            "then": {"properties": {"column": {"type": "string"}}},
+            "else": {"required": ["value"], "properties": {"value": {"type": "number"}}},
+        },
+    },
+    'SMA': {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {
+                "column": {"type": "string"},
+                "value": {"type": "number"},
+                "window_size": {"type": "integer", "minimum": 1},
+            },
+            "additionalProperties": False,
+        },
+        "allOf": _requires("window_size", "column"),
+    },
+    'ADX': {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {
+                "column": {"type": "string"},
+                "value": {"type": "number"},
+                "high": _PRICES,
+                "low": _PRICES,
+                "close": _PRICES,
+                "time_period": {"type": "integer", "minimum": 1},
+            },
+            "additionalProperties": False,
+        },
+        "allOf": _requires("high", "low", "close", "time_period"),
+    },
+}
+
+# Parameter validators generated from SCHEMAS once, at import time
+VALIDATORS = {node_type: fastjsonschema.compile(schema) for node_type, schema in SCHEMAS.items()}
+
 def get_operation_function(node_type):
     """
     Retrieves the operation function and required parameters for a given node type.
@@ -51,13 +107,6 @@ def get_operation_function(node_type):
     Raises:
         ValueError: If the node type is not supported.
     """
-    try:
-        if node_type in function_registry:
-            return function_registry[node_type]
-        else:
-            error_message = f"Unsupported node type: {node_type}"
-            logging.error(error_message)
-            raise ValueError(error_message)
-    except Exception as e:
-        logging.error("Error retrieving operation function: ", exc_info=True)
-        raise e
\ No newline at end of file
+    if node_type not in function_registry:
+        raise ValueError(f"Unsupported node type: {node_type}")
+    return function_registry[node_type]
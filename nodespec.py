@@ -0,0 +1,12 @@
+from typing import Callable, NamedTuple
+
+class NodeSpec(NamedTuple):
+    """
+    The attributes stored on every DAG node: the operation type, its parameters in the
+    internal representation, and the operation function and required parameter names
+    resolved from the function registry when the node is added.
+    """
+    type: str
+    parameters: dict
+    fn: Callable
+    required: list
@@ -0,0 +1,61 @@
+import time
+import unittest
+from unittest.mock import patch
+import app
+from dag_builder import DAGBuilder
+
+class TestApp(unittest.TestCase):
+    def setUp(self):
+        self.client = app.app.test_client()
+        patcher = patch('app.dag_builder', DAGBuilder())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def wait_for_run(self, run_id):
+        for _ in range(100):
+            response = self.client.get(f'/status/{run_id}')
+            self.assertEqual(response.status_code, 200)
+            if response.json["status"] in ("completed", "failed"):
+                return response.json
+            time.sleep(0.05)
+        self.fail(f"Execution {run_id} did not finish")
+
+    def test_execute_runs_in_background(self):
+        self.client.post('/add_node', json={"id": "1", "type": "ADD", "parameters": [{"column": "col1"}, {"value": 5}]})
+        self.client.post('/add_node', json={"id": "2", "type": "SMA", "parameters": [{"window_size": 3}, {"column": "col1"}]})
+        self.client.post('/add_edge', json={"source": "1", "target": "2"})
+
+        response = self.client.get('/execute')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json["status"], "submitted")
+        status = self.wait_for_run(response.json["run_id"])
+        self.assertEqual(status, {"run_id": response.json["run_id"], "status": "completed"})
+
+    def test_failed_execution_reports_error(self):
+        self.client.post('/add_node', json={"id": "1", "type": "ADD", "parameters": [{"value": 5}]})
+        with patch('app.execute_operations', side_effect=RuntimeError("boom")):
+            run_id = self.client.get('/execute').json["run_id"]
+            status = self.wait_for_run(run_id)
+        self.assertEqual(status["status"], "failed")
+        self.assertEqual(status["error"], "boom")
+
+    def test_unknown_run_id_is_not_found(self):
+        self.assertEqual(self.client.get('/status/unknown').status_code, 404)
+
+    def test_old_finished_runs_are_evicted(self):
+        with patch('app.RUN_STATUS_LIMIT', 2), patch.dict(app.active_runs, clear=True), patch.dict(app.finished_runs, clear=True):
+            app.set_run_status("running", {"status": "running"})
+            for run_id in ["first", "second", "third"]:
+                app.set_run_status(run_id, {"status": "completed"})
+            self.assertEqual(list(app.active_runs), ["running"])
+            self.assertEqual(list(app.finished_runs), ["third"])
+
+    def test_execute_is_refused_while_too_many_runs_are_active(self):
+        self.client.post('/add_node', json={"id": "1", "type": "ADD", "parameters": [{"value": 5}]})
+        with patch('app.RUN_STATUS_LIMIT', 1), patch.dict(app.active_runs, {"queued": {"status": "submitted"}}, clear=True):
+            response = self.client.get('/execute')
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(list(app.active_runs), ["queued"])
+
+if __name__ == '__main__':
+    unittest.main()
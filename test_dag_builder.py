@@ -0,0 +1,192 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import dependency_resolver
+from dag_builder import DAGBuilder
+from dependency_resolver import resolve_dependencies
+from executor import execute_operations
+
+class TestDAGBuilder(unittest.TestCase):
+    def setUp(self):
+        self.dag_builder = DAGBuilder()
+        for node_id in ["a", "b", "c", "d"]:
+            self.dag_builder.add_node(node_id, "SMA", [{"column": "col1"}, {"window_size": 1}])
+
+    def assertRespectsEdges(self):
+        order = self.dag_builder.topological_order()
+        self.assertCountEqual(order, self.dag_builder.graph.nodes())
+        position = {node: index for index, node in enumerate(order)}
+        for source, target in self.dag_builder.graph.edges():
+            self.assertLess(position[source], position[target])
+
+    def test_order_follows_insertion_without_edges(self):
+        self.assertEqual(self.dag_builder.topological_order(), ["a", "b", "c", "d"])
+
+    def test_backward_edge_reorders(self):
+        self.dag_builder.add_edge("d", "a")
+        self.dag_builder.add_edge("c", "d")
+        self.dag_builder.add_edge("b", "c")
+        self.assertEqual(self.dag_builder.topological_order(), ["b", "c", "d", "a"])
+        self.assertRespectsEdges()
+
+    def test_cycle_is_rejected_and_order_kept(self):
+        self.dag_builder.add_edge("a", "b")
+        self.dag_builder.add_edge("b", "c")
+        order = self.dag_builder.topological_order()
+        with self.assertRaises(ValueError):
+            self.dag_builder.add_edge("c", "a")
+        with self.assertRaises(ValueError):
+            self.dag_builder.add_edge("b", "b")
+        self.assertFalse(self.dag_builder.graph.has_edge("c", "a"))
+        self.assertEqual(self.dag_builder.topological_order(), order)
+
+    def test_remove_node_compacts_order(self):
+        self.dag_builder.add_edge("d", "b")
+        self.dag_builder.remove_node("a")
+        self.dag_builder.add_edge("c", "d")
+        self.assertEqual(len(self.dag_builder.topological_order()), 3)
+        self.assertRespectsEdges()
+
+    def test_in_degrees_and_roots_are_maintained(self):
+        self.dag_builder.add_edge("a", "b")
+        self.dag_builder.add_edge("a", "b")
+        self.dag_builder.add_edge("c", "b")
+        self.dag_builder.add_edge("b", "d")
+        self.assertEqual(self.dag_builder.in_degrees(), {"a": 0, "b": 2, "c": 0, "d": 1})
+        self.assertEqual(self.dag_builder.roots(), {"a", "c"})
+        self.dag_builder.remove_edge("b", "d")
+        self.dag_builder.remove_node("a")
+        self.assertEqual(self.dag_builder.in_degrees(), {"b": 1, "c": 0, "d": 0})
+        self.assertEqual(self.dag_builder.roots(), {"c", "d"})
+
+    def test_resolve_from_in_degrees_and_roots(self):
+        self.dag_builder.add_edge("d", "a")
+        self.dag_builder.add_edge("c", "d")
+        indeg = dict(self.dag_builder.in_degrees())
+        with patch('dependency_resolver.execute_node') as mock_execute_node:
+            execute_operations(resolve_dependencies(self.dag_builder.graph, indeg=self.dag_builder.in_degrees(), roots=self.dag_builder.roots()))
+        # The builder's mapping is only read
+        self.assertEqual(self.dag_builder.in_degrees(), indeg)
+        executed = [call.args[1] for call in mock_execute_node.call_args_list]
+        self.assertCountEqual(executed, ["a", "b", "c", "d"])
+        self.assertLess(executed.index("c"), executed.index("d"))
+        self.assertLess(executed.index("d"), executed.index("a"))
+
+    def test_version_tracks_mutations(self):
+        version = self.dag_builder.version
+        self.dag_builder.remove_edge("a", "b")
+        self.assertEqual(self.dag_builder.version, version)
+        self.dag_builder.add_edge("a", "b")
+        self.assertGreater(self.dag_builder.version, version)
+        version = self.dag_builder.version
+        with self.assertRaises(ValueError):
+            self.dag_builder.add_edge("b", "a")
+        self.assertEqual(self.dag_builder.version, version)
+
+    def test_execution_order_is_reused_until_modified(self):
+        graph, version = self.dag_builder.graph, self.dag_builder.version
+        with patch('dependency_resolver._resolve_order', wraps=dependency_resolver._resolve_order) as mock_resolve_order:
+            plan = resolve_dependencies(graph, version=version)
+            cached_plan = resolve_dependencies(graph, version=version)
+            self.assertEqual(mock_resolve_order.call_count, 1)
+            # Every resolve builds new tasks, so no run reuses another run's task keys
+            self.assertTrue(all(cached.key != task.key for cached, task in zip(cached_plan, plan)))
+            self.dag_builder.add_edge("a", "b")
+            resolve_dependencies(graph, version=self.dag_builder.version)
+            self.assertEqual(mock_resolve_order.call_count, 2)
+
+    def test_add_parameters_are_validated(self):
+        with self.assertRaises(ValueError):
+            self.dag_builder.add_node("e", "ADD", [{"column": 1}])
+        with self.assertRaises(ValueError):
+            self.dag_builder.add_node("e", "ADD", [{"window_size": 5}])
+        with self.assertRaises(ValueError):
+            self.dag_builder.add_node("e", "SMA", [{"window_size": "5"}])
+        self.assertNotIn("e", self.dag_builder.graph)
+
+    def test_parameters_round_trip_through_json(self):
+        parameters = [{"column": "col1"}, {"column": "col2"}, {"value": 5}]
+        self.dag_builder.add_node("e", "ADD", parameters)
+        nodes = {node["id"]: node for node in json.loads(self.dag_builder.to_json())["nodes"]}
+        self.assertEqual(nodes["e"]["parameters"], parameters)
+
+    def test_operation_settings_are_kept(self):
+        self.dag_builder.add_node("e", "SMA", [{"window_size": 3}, {"column": "col1"}])
+        spec = self.dag_builder.graph.nodes["e"]["spec"]
+        self.assertEqual(spec.parameters["window_size"], 3)
+        self.assertTrue(all(param in spec.parameters for param in spec.required))
+        nodes = {node["id"]: node for node in self.dag_builder.to_dict()["nodes"]}
+        self.assertCountEqual(nodes["e"]["parameters"], [{"window_size": 3}, {"column": "col1"}])
+        with self.assertRaises(ValueError):
+            self.dag_builder.add_node("f", "SMA", [{"window": 3}])
+
+    def test_settings_sharing_an_entry_are_kept(self):
+        self.dag_builder.add_node("e", "SMA", [{"column": "col1", "window_size": 3}])
+        self.assertEqual(self.dag_builder.graph.nodes["e"]["spec"].parameters, {"columns": ["col1"], "value": None, "window_size": 3})
+
+    def test_required_settings_are_checked_on_add(self):
+        with self.assertRaises(ValueError):
+            self.dag_builder.add_node("e", "SMA", [{"value": 2}])
+        with self.assertRaises(ValueError):
+            self.dag_builder.add_node("e", "SMA", [{"window_size": 3}])
+        with self.assertRaises(ValueError):
+            self.dag_builder.add_node("e", "ADX", [{"high": [1.0]}, {"low": [1.0]}, {"close": [1.0]}])
+        self.assertNotIn("e", self.dag_builder.graph)
+        self.dag_builder.add_node("e", "ADX", [{"high": [1.0], "low": [1.0], "close": [1.0]}, {"time_period": 14}])
+        self.assertEqual(self.dag_builder.graph.nodes["e"]["spec"].parameters["time_period"], 14)
+
+    def test_load_from_file_round_trip(self):
+        self.dag_builder.add_edge("c", "a")
+        self.dag_builder.add_edge("a", "b")
+        with tempfile.TemporaryDirectory() as directory:
+            filepath = os.path.join(directory, "dag.json")
+            self.dag_builder.save_to_file(filepath)
+            loaded = DAGBuilder()
+            loaded.load_from_file(filepath)
+        self.assertCountEqual(loaded.graph.edges(), [("c", "a"), ("a", "b")])
+        self.dag_builder = loaded
+        self.assertRespectsEdges()
+
+    def test_load_from_file_rejects_cycles(self):
+        config = {
+            "nodes": [{"id": node_id, "type": "ADD", "parameters": [{"value": 1}]} for node_id in ["x", "y"]],
+            "edges": [{"source": "x", "target": "y"}, {"source": "y", "target": "x"}],
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            filepath = os.path.join(directory, "dag.json")
+            with open(filepath, 'w') as file:
+                json.dump(config, file)
+            with self.assertRaises(ValueError):
+                self.dag_builder.load_from_file(filepath)
+        # The existing DAG is left untouched
+        self.assertCountEqual(self.dag_builder.graph.nodes(), ["a", "b", "c", "d"])
+
+    def test_non_strict_edge_allows_cycle_until_removed(self):
+        self.dag_builder.add_edge("a", "b")
+        self.dag_builder.add_edge("b", "c")
+        self.dag_builder.add_edge("c", "a", strict=False)
+        self.assertTrue(self.dag_builder.has_cycles())
+        with self.assertRaises(ValueError):
+            self.dag_builder.topological_order()
+        with self.assertRaises(ValueError):
+            self.dag_builder.add_edge("c", "b")
+        self.dag_builder.remove_edge("c", "a")
+        self.assertFalse(self.dag_builder.has_cycles())
+        self.assertRespectsEdges()
+
+    def test_resolve_with_condensation_groups_cycles(self):
+        self.dag_builder.add_edge("d", "a")
+        self.dag_builder.add_edge("a", "b")
+        self.dag_builder.add_edge("b", "a", strict=False)
+        self.dag_builder.add_edge("b", "c")
+        plan = self.dag_builder.resolve_with_condensation()
+        self.assertEqual(len(plan), 3)
+        with patch('dependency_resolver.execute_node') as mock_execute_node:
+            execute_operations(plan)
+        executed = [call.args[1] for call in mock_execute_node.call_args_list]
+        self.assertEqual(executed, ["d", "a", "b", "c"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,22 @@
+import unittest
+import networkx as nx
+from dependency_resolver import resolve_dependencies
+from executor import execute_operations
+from nodespec import NodeSpec
+
+class TestExecutor(unittest.TestCase):
+    def test_in_process_execution_respects_dependencies(self):
+        executed = []
+        graph = nx.DiGraph()
+        node_ids = "abcdefghij"
+        for node_id in node_ids:
+            graph.add_node(node_id, spec=NodeSpec("ADD", {"node": node_id}, lambda parameters: executed.append(parameters["node"]), []))
+        # A chain j -> i -> ... -> a, added in the opposite order
+        for source, target in zip(node_ids[1:], node_ids):
+            graph.add_edge(source, target)
+
+        execute_operations(resolve_dependencies(graph))
+        self.assertEqual(executed, list(reversed(node_ids)))
+
+if __name__ == '__main__':
+    unittest.main()
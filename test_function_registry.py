@@ -1,7 +1,7 @@
 import unittest
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 from dag_builder import DAGBuilder
-from function_registry import get_operation_function, function_registry
+from function_registry import function_registry
 from dependency_resolver import execute_node
 
 class TestFunctionRegistry(unittest.TestCase):
@@ -10,7 +10,7 @@ class TestFunctionRegistry(unittest.TestCase):
 
     def test_supported_node_types(self):
         # Test adding supported node types
-        with patch.dict(function_registry, {'ADD': (lambda x: None, ['columns', 'value']), 'SMA': (lambda x: None, ['window_size', 'column'])}):
+        with patch.dict(function_registry, {'ADD': (lambda x: None, ['columns', 'value']), 'SMA': (lambda x: None, ['window_size', 'columns'])}):
             self.dag_builder.add_node("1", "ADD", [{"column": "col1"}, {"column": "col2"}, {"value": 5}])
             self.dag_builder.add_node("2", "SMA", [{"window_size": 5}, {"column": "col3"}])
             self.assertIn("1", self.dag_builder.graph)
@@ -20,18 +20,23 @@ class TestFunctionRegistry(unittest.TestCase):
         # Test adding an unsupported node type
         with self.assertRaises(ValueError):
             self.dag_builder.add_node("3", "UNSUPPORTED_TYPE", [{"param": "value"}])
+        with self.assertRaises(ValueError):
+            self.dag_builder.add_node("3", ["ADD"], [{"value": 5}])
+
+    def test_function_is_bound_on_add(self):
+        # Test that the function registered when the node was added is called with the internal parameters
+        mock_add_operation = MagicMock()
+        mock_sma_operation = MagicMock()
+        with patch.dict(function_registry, {'ADD': (mock_add_operation, ['columns', 'value']), 'SMA': (mock_sma_operation, ['window_size', 'columns'])}):
+            self.dag_builder.add_node("1", "ADD", [{"column": "col1"}, {"column": "col2"}, {"value": 5}])
+            self.dag_builder.add_node("2", "SMA", [{"window_size": 5}, {"column": "col3"}])
 
-    @patch('function_registry.add_operation')
-    @patch('function_registry.sma_operation')
-    def test_correct_function_calls(self, mock_sma_operation, mock_add_operation):
-        # Test that the correct functions are called with expected parameters
-        node_data_add = {"type": "ADD", "parameters": {"columns": ["col1", "col2"], "value": 5}}
-        execute_node(node_data_add, "1")
+        # The registry is restored by now, so only the functions bound on add can be called
+        execute_node(self.dag_builder.graph.nodes["1"], "1")
         mock_add_operation.assert_called_once_with({"columns": ["col1", "col2"], "value": 5})
 
-        node_data_sma = {"type": "SMA", "parameters": {"window_size": 5, "column": "col3"}}
-        execute_node(node_data_sma, "2")
-        mock_sma_operation.assert_called_once_with({"window_size": 5, "column": "col3"})
+        execute_node(self.dag_builder.graph.nodes["2"], "2")
+        mock_sma_operation.assert_called_once_with({"columns": ["col3"], "value": None, "window_size": 5})
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
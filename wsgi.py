@@ -0,0 +1,4 @@
+from app import app
+
+# WSGI entry point for production servers, for example:
+#   gunicorn -k gthread --threads 8 -w 1 -b 127.0.0.1:8080 wsgi:app